@@ -0,0 +1,94 @@
+"""Short-lived caching and request coalescing for read-only device queries."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+try:
+    from meshcore import EventType
+    _EVT_ERROR = EventType.ERROR
+except ImportError:
+    _EVT_ERROR = None
+
+# Cache lifetimes (seconds) for the read-only device queries
+CONTACTS_TTL = 30.0
+DEVICE_INFO_TTL = 30.0
+BATTERY_TTL = 10.0
+
+# Completed results keyed by query name: (monotonic timestamp, result)
+_cache: dict[str, tuple[float, Any]] = {}
+
+# Queries currently running on the device, shared by concurrent callers
+_inflight: dict[str, asyncio.Task] = {}
+
+# Bumped by clear_cache so queries started before a clear are not stored
+_generation = 0
+
+
+async def cached(key: str, ttl: float, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run a device query, reusing a recent result or one already in flight.
+
+    Concurrent callers for the same key wait on a single call to fn, and a
+    successful result is reused for ttl seconds. ERROR events and exceptions
+    are never cached.
+
+    Args:
+        key: Cache key identifying the query
+        ttl: Seconds a successful result stays valid
+        fn: Coroutine function performing the device query
+
+    Returns:
+        The query result (a meshcore Event)
+    """
+    result = peek(key, ttl)
+    if result is not None:
+        return result
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn())
+        _inflight[key] = task
+        generation = _generation
+        task.add_done_callback(lambda t: _store_result(key, t, generation))
+
+    # Shield so one cancelled caller does not cancel the query for the others
+    return await asyncio.shield(task)
+
+
+def peek(key: str, ttl: float) -> Any:
+    """
+    Return a cached result if it is still fresh, without querying the device.
+
+    Args:
+        key: Cache key identifying the query
+        ttl: Seconds a successful result stays valid
+
+    Returns:
+        The cached result, or None if there is no fresh entry
+    """
+    entry = _cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+    return None
+
+
+def _store_result(key: str, task: asyncio.Task, generation: int) -> None:
+    """Record a finished query in the cache if it succeeded."""
+    if _inflight.get(key) is task:
+        del _inflight[key]
+    if task.cancelled() or task.exception() is not None:
+        return
+    if generation != _generation:
+        return
+    result = task.result()
+    if getattr(result, "type", None) is not _EVT_ERROR:
+        _cache[key] = (time.monotonic(), result)
+
+
+def clear_cache() -> None:
+    """Drop all cached results, e.g. when the device connection changes."""
+    global _generation
+    _generation += 1
+    _cache.clear()
+    _inflight.clear()
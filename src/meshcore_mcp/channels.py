@@ -1,5 +1,6 @@
 """Channel name mapping and parsing utilities."""
 
+from functools import lru_cache
 from typing import Optional
 
 
@@ -22,6 +23,15 @@ CHANNEL_NAME_MAP = {
     "default": 0
 }
 
+# Precomputed at import so parse_channel_input does no per-call normalization
+# of the map or formatting of the list of accepted names
+_CHANNEL_NAME_MAP_NORM = {name.lower().strip(): num for name, num in CHANNEL_NAME_MAP.items()}
+_AVAILABLE_NAMES_STR = ", ".join(f"'{name}'" for name in sorted(_CHANNEL_NAME_MAP_NORM))
+_UNKNOWN_CHANNEL_TEMPLATE = "Error: Unknown channel name '{}'. Use " + _AVAILABLE_NAMES_STR + " or channel number 0-7"
+
+# Display names indexed by channel number, built once instead of per call
+_CHANNEL_DISPLAY = tuple(f"{num} ({CHANNEL_NAMES[num]})" for num in range(len(CHANNEL_NAMES)))
+
 
 def parse_channel_input(channel_input: Optional[str | int]) -> tuple[Optional[int], Optional[str]]:
     """
@@ -52,25 +62,36 @@ def parse_channel_input(channel_input: Optional[str | int]) -> tuple[Optional[in
 
     # If it's a string, try to parse it
     if isinstance(channel_input, str):
-        # Try to parse as integer first
-        try:
-            channel_num = int(channel_input)
-            if 0 <= channel_num <= 7:
-                return (channel_num, None)
-            else:
-                return (None, f"Error: Channel number must be between 0 and 7, got {channel_num}")
-        except ValueError:
-            # Not a number, try to map from name
-            channel_name_lower = channel_input.lower().strip()
-            if channel_name_lower in CHANNEL_NAME_MAP:
-                return (CHANNEL_NAME_MAP[channel_name_lower], None)
-            else:
-                available_names = ", ".join(f"'{name}'" for name in sorted(CHANNEL_NAME_MAP.keys()))
-                return (None, f"Error: Unknown channel name '{channel_input}'. Use {available_names} or channel number 0-7")
+        return _parse_channel_str(channel_input)
 
     return (None, f"Error: Invalid channel input type: {type(channel_input)}")
 
 
+@lru_cache(maxsize=64)
+def _parse_channel_str(channel_input: str) -> tuple[Optional[int], Optional[str]]:
+    """Parse a channel given as a string; memoized since clients repeat the same few names."""
+    # Names given exactly as mapped need no normalization
+    channel_num = _CHANNEL_NAME_MAP_NORM.get(channel_input)
+    if channel_num is not None:
+        return (channel_num, None)
+
+    channel_str = channel_input.strip()
+
+    # Numeric strings take the fast path without a try/except around int()
+    digits = channel_str[1:] if channel_str[:1] in ("+", "-") else channel_str
+    if digits.isdecimal():
+        channel_num = int(channel_str)
+        if 0 <= channel_num <= 7:
+            return (channel_num, None)
+        return (None, f"Error: Channel number must be between 0 and 7, got {channel_num}")
+
+    # Not a number, try to map from name
+    channel_num = _CHANNEL_NAME_MAP_NORM.get(channel_str.lower())
+    if channel_num is not None:
+        return (channel_num, None)
+    return (None, _UNKNOWN_CHANNEL_TEMPLATE.format(channel_input))
+
+
 def get_channel_display_name(channel_num: int) -> str:
     """
     Get a friendly display name for a channel number.
@@ -81,6 +102,6 @@ def get_channel_display_name(channel_num: int) -> str:
     Returns:
         Friendly name like "0 (General/Public)" or "5 (Channel 5)"
     """
-    if channel_num in CHANNEL_NAMES:
-        return f"{channel_num} ({CHANNEL_NAMES[channel_num]})"
+    if 0 <= channel_num < len(_CHANNEL_DISPLAY):
+        return _CHANNEL_DISPLAY[channel_num]
     return str(channel_num)
@@ -1,13 +1,131 @@
 """Connection management utilities."""
 
-from typing import Optional
+import asyncio
+import functools
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
 
 try:
-    from meshcore import MeshCore
+    from meshcore import MeshCore, EventType
+    _EVT_ERROR = EventType.ERROR
 except ImportError:
     MeshCore = None
+    _EVT_ERROR = None
 
-from .state import state
+from .state import state, ConnectionParams, SerialParams, BLEParams, TCPParams
+from .cache import clear_cache
+
+# Configure logger
+logger = logging.getLogger(__name__)
+
+# Seconds a successful is_connected check is trusted before probing again
+LIVE_TTL = 1.0
+
+# Seconds allowed for reconnecting the existing MeshCore instance
+RECONNECT_TIMEOUT = 3.0
+
+# Bounds (seconds) of the delay between failed auto-reconnect attempts
+RECONNECT_BACKOFF_MIN = 1.0
+RECONNECT_BACKOFF_MAX = 30.0
+
+# Reconnect attempt currently running, shared by concurrent callers
+_restore_task: Optional[asyncio.Task] = None
+
+
+def enable_low_latency(mc) -> None:
+    """
+    Best-effort switch of a serial connection to ASYNC_LOW_LATENCY mode.
+
+    USB-serial adapters (notably FTDI) otherwise hold received bytes for up
+    to 16 ms before handing them to the host. meshcore does not expose the
+    port, so this reaches through its transport and quietly gives up when
+    the layout, platform or driver does not allow it.
+
+    Args:
+        mc: Connected MeshCore instance
+    """
+    cx = getattr(getattr(mc, "connection_manager", None), "connection", None)
+    port = getattr(getattr(cx, "transport", None), "serial", None)
+    # pyserial defines this on all POSIX ports but only implements it on
+    # Linux; elsewhere it raises NotImplementedError
+    set_mode = getattr(port, "set_low_latency_mode", None)
+    if set_mode is None:
+        return
+    try:
+        set_mode(True)
+    except (ValueError, OSError, NotImplementedError) as e:
+        logger.debug("Low-latency serial mode unavailable: %s", e)
+
+
+async def _create_serial(params: SerialParams, debug: bool):
+    mc = await MeshCore.create_serial(
+        params.port,
+        params.baud_rate,
+        debug=debug
+    )
+    enable_low_latency(mc)
+    return mc
+
+
+async def _create_ble(params: BLEParams, debug: bool):
+    return await MeshCore.create_ble(
+        params.address,
+        pin=params.pin
+    )
+
+
+async def _create_tcp(params: TCPParams, debug: bool):
+    if params.auto_reconnect:
+        return await MeshCore.create_tcp(
+            params.host,
+            params.port,
+            auto_reconnect=True,
+            max_reconnect_attempts=5
+        )
+    return await MeshCore.create_tcp(
+        params.host,
+        params.port
+    )
+
+
+# Connection builders keyed by type: (display label, required params, builder)
+CONNECTORS = {
+    "serial": ("serial", ("port",), _create_serial),
+    "ble": ("BLE", ("address",), _create_ble),
+    "tcp": ("TCP", ("host", "port"), _create_tcp),
+}
+
+
+async def open_connection(conn_type: str, params: ConnectionParams, debug: bool) -> Optional[str]:
+    """
+    Validate connection parameters and create a MeshCore connection.
+
+    Used by both meshcore_connect and the auto-reconnect path so the two
+    cannot drift apart. On success the new instance is stored in state.
+
+    Args:
+        conn_type: Connection type, a key of CONNECTORS
+        params: Connection parameters for that type
+        debug: Enable debug mode
+
+    Returns:
+        None if connected successfully, error message otherwise
+    """
+    label, required, builder = CONNECTORS[conn_type]
+    missing = [key for key in required if not getattr(params, key)]
+    if missing:
+        names = " and ".join(f"'{key}'" for key in missing)
+        return f"Error: {names} required for {label} connection"
+
+    state.meshcore = await builder(params, debug)
+    state.last_live_ts = time.monotonic()
+    return None
+
+
+def _is_live() -> bool:
+    """Return True if the connection was confirmed live within LIVE_TTL seconds."""
+    return state.meshcore is not None and time.monotonic() - state.last_live_ts < LIVE_TTL
 
 
 async def ensure_connected() -> Optional[str]:
@@ -18,47 +136,171 @@ async def ensure_connected() -> Optional[str]:
         None if connected successfully, error message otherwise
     """
     # If no connection params stored, can't auto-connect
-    if not state.connection_params:
+    if state.connection_params is None:
         return "Error: Not connected. Use meshcore_connect first."
 
-    # If already connected, nothing to do
-    if state.meshcore is not None and state.meshcore.is_connected:
+    # If already connected, nothing to do. A recent successful check is
+    # trusted for LIVE_TTL seconds to keep the probe off every tool call.
+    mc = state.meshcore
+    if mc is not None:
+        now = time.monotonic()
+        if now - state.last_live_ts < LIVE_TTL:
+            return None
+        if mc.is_connected:
+            state.last_live_ts = now
+            return None
+
+    # Back off after failed attempts so a flapping link is not hammered
+    now = time.monotonic()
+    if now < state.next_reconnect_ts:
+        return f"Error: Device disconnected. Next reconnect attempt in {state.next_reconnect_ts - now:.0f}s."
+
+    # Concurrent callers share one attempt instead of each opening the port
+    global _restore_task
+    if _restore_task is None or _restore_task.done():
+        _restore_task = asyncio.ensure_future(_restore_connection())
+
+    # Shield so one cancelled caller does not abort the attempt for the others
+    return await asyncio.shield(_restore_task)
+
+
+async def _restore_connection() -> Optional[str]:
+    """
+    Reconnect in place, falling back to recreating the connection.
+
+    Returns:
+        None if connected successfully, error message otherwise
+    """
+    if await _reconnect() is None:
+        state.reconnect_backoff = 0.0
+        state.next_reconnect_ts = 0.0
         return None
 
     # Need to reconnect - recreate connection
-    try:
-        conn_type = state.connection_type
-        params = state.connection_params
-        debug = state.debug
-
-        if conn_type == "serial":
-            state.meshcore = await MeshCore.create_serial(
-                params["port"],
-                params["baud_rate"],
-                debug=debug
-            )
-        elif conn_type == "ble":
-            state.meshcore = await MeshCore.create_ble(
-                params["address"],
-                pin=params.get("pin")
-            )
-        elif conn_type == "tcp":
-            if params.get("auto_reconnect"):
-                state.meshcore = await MeshCore.create_tcp(
-                    params["host"],
-                    params["port"],
-                    auto_reconnect=True,
-                    max_reconnect_attempts=5
-                )
-            else:
-                state.meshcore = await MeshCore.create_tcp(
-                    params["host"],
-                    params["port"]
-                )
-        else:
-            return f"Error: Invalid stored connection type '{conn_type}'"
+    conn_type = state.connection_type
+    if conn_type not in CONNECTORS:
+        return f"Error: Invalid stored connection type '{conn_type}'"
 
+    try:
+        error = await open_connection(conn_type, state.connection_params, state.debug)
+        if error:
+            return error
+        clear_cache()
+        state.reconnect_backoff = 0.0
+        state.next_reconnect_ts = 0.0
         return None  # Success
 
     except Exception as e:
-        return f"Auto-reconnect failed: {str(e)}"
+        logger.exception("Auto-reconnect to %s device failed", conn_type)
+        state.reconnect_backoff = min(
+            max(state.reconnect_backoff * 2, RECONNECT_BACKOFF_MIN),
+            RECONNECT_BACKOFF_MAX
+        )
+        state.next_reconnect_ts = time.monotonic() + state.reconnect_backoff
+        return f"Auto-reconnect failed: {e}"
+
+
+async def _reconnect() -> Optional[str]:
+    """
+    Reconnect the existing MeshCore instance in place.
+
+    Much cheaper than a full create_* (notably for BLE), and the instance
+    keeps its event subscriptions.
+
+    Returns:
+        None if reconnected, otherwise the reason a full recreate is needed
+    """
+    mc = state.meshcore
+    if mc is None:
+        return "no existing instance"
+
+    try:
+        result = await asyncio.wait_for(mc.connect(), timeout=RECONNECT_TIMEOUT)
+    except Exception as e:
+        logger.debug("In-place reconnect failed: %r", e)
+        await _close_quietly(mc)
+        return str(e) or type(e).__name__
+
+    if result is None or not mc.is_connected:
+        await _close_quietly(mc)
+        return "device did not respond"
+
+    # Reopening the port resets its flags
+    if state.connection_type == "serial":
+        enable_low_latency(mc)
+
+    state.last_live_ts = time.monotonic()
+    clear_cache()
+    return None
+
+
+async def _close_quietly(mc) -> None:
+    """
+    Disconnect a MeshCore instance whose reconnect failed, ignoring errors.
+
+    A failed or timed-out connect() can leave the transport open, and the
+    full recreate that follows would otherwise open the same port again.
+    """
+    try:
+        await mc.disconnect()
+    except Exception as e:
+        logger.debug("Disconnect after failed reconnect failed: %r", e)
+
+
+async def run_command(command: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+    """
+    Run a MeshCore command while holding the device command lock.
+
+    The device link is a single serial/BLE/TCP pipe, so concurrent tool calls
+    are serialized here instead of interleaving requests on the transport.
+    A non-error reply also proves the link is up, so it refreshes the cached
+    liveness check and the next tool call skips the is_connected probe.
+
+    Args:
+        command: Bound command coroutine function, e.g. state.meshcore.commands.get_bat
+        *args: Positional arguments for the command
+        **kwargs: Keyword arguments for the command
+
+    Returns:
+        The command result event
+    """
+    async with state.command_lock:
+        result = await command(*args, **kwargs)
+    if getattr(result, "type", None) is not _EVT_ERROR:
+        state.last_live_ts = time.monotonic()
+    return result
+
+
+def requires_connection(label: str):
+    """
+    Decorate a tool that needs a connected device.
+
+    The wrapped tool first runs ensure_connected() and returns its error
+    message if the device is unavailable. Any exception raised by the tool
+    is logged with its traceback and turned into a "<label> failed: <error>"
+    message, and the cached liveness check is reset so the next call
+    re-probes the connection.
+
+    Args:
+        label: Operation name used in failure messages, e.g. "Get battery"
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            # Ensure connected (auto-reconnect if needed). The common case of a
+            # recently confirmed connection is checked without awaiting.
+            if not _is_live():
+                error = await ensure_connected()
+                if error:
+                    return error
+
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                state.last_live_ts = 0.0
+                logger.exception("%s failed", label)
+                return f"{label} failed: {e}"
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,38 @@
+"""Shared output formatting helpers for MCP tool responses."""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def to_json(data: Any) -> str:
+    """
+    Serialize a payload as indented JSON.
+
+    Uses orjson when it is installed (speedups extra) and the standard
+    library otherwise. Both produce 2-space indented UTF-8 output, though
+    float notation can differ (orjson writes 0.00001 where json writes
+    1e-05). Payloads orjson rejects, such as integers beyond 64 bits, fall
+    back to the standard library. Values JSON cannot represent (e.g. bytes)
+    are converted with str().
+
+    Args:
+        data: Payload to serialize
+
+    Returns:
+        JSON string
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(
+                data,
+                default=str,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        except TypeError:
+            pass
+    return json.dumps(data, default=str, indent=2, ensure_ascii=False)
@@ -1,87 +1,102 @@
 """Message event handlers and subscription management."""
 
+import itertools
 import logging
-import sys
-from datetime import datetime
+import time
 
-from .state import state
+from .state import state, Message
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Arrival order across both message buffers
+_arrival_seq = itertools.count()
 
-async def handle_contact_message(event):
+
+# The handlers are plain functions: meshcore calls synchronous callbacks
+# inline, but schedules a separate task for every coroutine callback.
+def handle_contact_message(event):
     """Callback for handling received contact messages."""
     try:
-        logger.debug(f"Contact message event received: {event.type}")
-        logger.debug(f"Event payload: {event.payload}")
-
-        message_data = {
-            "type": "contact",
-            "timestamp": datetime.now().isoformat(),
-            "sender": event.payload.get("sender", "Unknown"),
-            "sender_key": event.payload.get("sender_key", "N/A"),
-            "pubkey_prefix": event.payload.get("pubkey_prefix", "N/A"),
-            "text": event.payload.get("text", ""),
-            "raw_payload": event.payload
-        }
-        state.message_buffer.append(message_data)
-        logger.debug(f"Contact message added to buffer. Buffer size: {len(state.message_buffer)}")
-        logger.debug(f"Message from {message_data['sender']} (pubkey: {message_data['pubkey_prefix']}): {message_data['text']}")
-    except Exception as e:
-        logger.error(f"Error handling contact message: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
-
-
-async def handle_channel_message(event):
+        logger.debug("Contact message event received: %s", event.type)
+        logger.debug("Event payload: %s", event.payload)
+
+        payload = event.payload
+        get = payload.get
+        message = Message(
+            type="contact",
+            received_at=time.time(),
+            sender=get("sender", "Unknown"),
+            sender_key=get("sender_key", "N/A"),
+            pubkey_prefix=get("pubkey_prefix", "N/A"),
+            text=get("text", ""),
+            raw_payload=payload
+        )
+        state.contact_buffer.append((next(_arrival_seq), message))
+        logger.debug("Contact message added to buffer. Buffer size: %d", len(state.contact_buffer))
+        logger.debug("Message from %s (pubkey: %s): %s",
+                     message.sender, message.pubkey_prefix, message.text)
+    except Exception:
+        logger.exception("Error handling contact message")
+
+
+def handle_channel_message(event):
     """Callback for handling received channel messages."""
     try:
-        logger.debug(f"Channel message event received: {event.type}")
-        logger.debug(f"Event payload: {event.payload}")
-
-        message_data = {
-            "type": "channel",
-            "timestamp": datetime.now().isoformat(),
-            "channel": event.payload.get("channel", "Unknown"),
-            "sender": event.payload.get("sender", "Unknown"),
-            "sender_key": event.payload.get("sender_key", "N/A"),
-            "pubkey_prefix": event.payload.get("pubkey_prefix", "N/A"),
-            "text": event.payload.get("text", ""),
-            "raw_payload": event.payload
-        }
-        state.message_buffer.append(message_data)
-        logger.debug(f"Channel message added to buffer. Buffer size: {len(state.message_buffer)}")
-        logger.debug(f"Message from {message_data['sender']} (pubkey: {message_data['pubkey_prefix']}) on channel {message_data['channel']}: {message_data['text']}")
-    except Exception as e:
-        logger.error(f"Error handling channel message: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
-
-
-async def handle_advertisement(event):
-    """Callback for handling advertisement events."""
-    try:
-        logger.debug(f"Advertisement event received: {event.type}")
-        logger.debug(f"Advertisement payload: {event.payload}")
+        logger.debug("Channel message event received: %s", event.type)
+        logger.debug("Event payload: %s", event.payload)
+
+        payload = event.payload
+        get = payload.get
+        message = Message(
+            type="channel",
+            received_at=time.time(),
+            channel=get("channel", "Unknown"),
+            sender=get("sender", "Unknown"),
+            sender_key=get("sender_key", "N/A"),
+            pubkey_prefix=get("pubkey_prefix", "N/A"),
+            text=get("text", ""),
+            raw_payload=payload
+        )
+        state.channel_buffer.append((next(_arrival_seq), message))
+        logger.debug("Channel message added to buffer. Buffer size: %d", len(state.channel_buffer))
+        logger.debug("Message from %s (pubkey: %s) on channel %s: %s",
+                     message.sender, message.pubkey_prefix,
+                     message.channel, message.text)
+    except Exception:
+        logger.exception("Error handling channel message")
+
+
+def handle_advertisement(event):
+    """
+    Callback for handling advertisement events.
+
+    Synchronous so meshcore calls it inline rather than scheduling a task per
+    advertisement. It only logs, so it returns at once unless DEBUG is enabled.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    logger.debug("Advertisement event received: %s", event.type)
+    logger.debug("Advertisement payload: %s", event.payload)
 
-        # Advertisements contain info about nearby devices
-        # This is useful for monitoring mesh network activity
-    except Exception as e:
-        logger.error(f"Error handling advertisement: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+    # Advertisements contain info about nearby devices
+    # This is useful for monitoring mesh network activity
 
 
 def cleanup_message_subscriptions():
     """Clean up all active message subscriptions."""
-    logger.debug(f"Cleaning up {len(state.message_subscriptions)} message subscriptions")
+    logger.debug("Cleaning up %d message subscriptions", len(state.message_subscriptions))
+    # Keep going past a failed unsubscribe so the others are still removed
+    errors = []
     for subscription in state.message_subscriptions:
         try:
             subscription.unsubscribe()
-            logger.debug(f"Unsubscribed from: {subscription}")
         except Exception as e:
-            logger.error(f"Error unsubscribing: {e}")
+            errors.append(e)
+    if errors:
+        logger.error("Error unsubscribing %d of %d subscriptions: %s",
+                     len(errors), len(state.message_subscriptions), "; ".join(map(str, errors)))
     state.message_subscriptions.clear()
     state.is_listening = False
-    logger.debug(f"Message listening cleanup complete. Listening: {state.is_listening}")
+    logger.debug("Message listening cleanup complete. Listening: %s", state.is_listening)
@@ -7,39 +7,65 @@ Supports Serial, BLE, and TCP connections via HTTP/Streamable transport.
 """
 
 import argparse
+import functools
 import logging
 import sys
+import time
 from datetime import datetime
 from contextlib import asynccontextmanager
 
-from mcp.server.fastmcp import FastMCP
-
 # Configure logger
 logger = logging.getLogger(__name__)
 
-# Import meshcore library
-try:
-    from meshcore import MeshCore, EventType
-except ImportError:
-    print("Error: meshcore library not installed. Run: pip install meshcore", file=sys.stderr)
-    sys.exit(1)
 
-# Import our modules
-from .state import state
-from .message_handlers import handle_contact_message, handle_channel_message, handle_advertisement, cleanup_message_subscriptions
+@functools.lru_cache(maxsize=None)
+def get_mcp():
+    """
+    Build the FastMCP server and register all tools on first use.
+
+    FastMCP and the meshcore library are imported here rather than at module
+    level, so --help and argument errors return without loading them.
+    """
+    from mcp.server.fastmcp import FastMCP
+
+    # Import tool registration functions
+    from .tools import connect, messages, device, time
+
+    # Initialize MCP server with FastMCP
+    mcp = FastMCP("meshcore-mcp")
+
+    # Register all tools
+    connect.register_tools(mcp)
+    messages.register_tools(mcp)
+    device.register_tools(mcp)
+    time.register_tools(mcp)
+
+    return mcp
+
 
-# Import tool registration functions
-from .tools import connect, messages, device, time
+class TrailingSlashMiddleware:
+    """
+    Normalize trailing slashes to avoid 307 redirects.
 
+    Implemented as plain ASGI middleware rather than BaseHTTPMiddleware, so
+    requests are not wrapped in an extra task group and response stream.
+    """
 
-# Initialize MCP server with FastMCP
-mcp = FastMCP("meshcore-mcp")
+    def __init__(self, app):
+        self.app = app
 
-# Register all tools
-connect.register_tools(mcp)
-messages.register_tools(mcp)
-device.register_tools(mcp)
-time.register_tools(mcp)
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            # If path ends with /, remove it before processing
+            path = scope["path"]
+            if path.endswith("/") and len(path) > 1:
+                # Copy rather than mutate the scope passed in, per the ASGI spec
+                scope = {**scope, "path": path.rstrip("/")}
+                # Keep raw_path consistent with path for anything that reads it
+                raw_path = scope.get("raw_path")
+                if raw_path:
+                    scope["raw_path"] = raw_path.rstrip(b"/") or b"/"
+        await self.app(scope, receive, send)
 
 
 async def startup_connect(serial_port: str, baud_rate: int, debug: bool, sync_clock: bool = False) -> bool:
@@ -55,47 +81,46 @@ async def startup_connect(serial_port: str, baud_rate: int, debug: bool, sync_cl
     Returns:
         True if connected successfully, False otherwise
     """
+    from meshcore import MeshCore, EventType
+    from .state import state, SerialParams
+    from .connection import run_command, enable_low_latency
+
     logger.info(f"Attempting to connect to {serial_port} at {baud_rate} baud...")
 
     try:
         state.meshcore = await MeshCore.create_serial(serial_port, baud_rate, debug=debug)
+        enable_low_latency(state.meshcore)
         state.connection_type = "serial"
-        state.connection_params = {"port": serial_port, "baud_rate": baud_rate}
+        state.connection_params = SerialParams(port=serial_port, baud_rate=baud_rate)
         state.debug = debug
 
-        logger.info(f"Successfully connected to MeshCore device on {serial_port}")
-        logger.info(f"Connection state - Type: {state.connection_type}, Debug: {state.debug}")
+        logger.info(f"Successfully connected to MeshCore device on {serial_port} (type: {state.connection_type}, debug: {state.debug})")
 
         # Sync clock if requested
         if sync_clock:
             logger.info("Syncing device clock to system time...")
             try:
-                import time
-                current_time = int(time.time())
-                dt = datetime.fromtimestamp(current_time)
+                current_time = time.time_ns() // 1_000_000_000
+                result = await run_command(state.meshcore.commands.set_time, current_time)
 
-                result = await state.meshcore.commands.set_time(current_time)
-
-                if result.type == EventType.ERROR:
+                if result.type is EventType.ERROR:
                     logger.warning(f"Clock sync failed: {result.payload}")
                 else:
+                    dt = datetime.fromtimestamp(current_time)
                     logger.info(f"Clock synced successfully to {dt.strftime('%Y-%m-%d %H:%M:%S')}")
             except Exception as e:
-                logger.warning(f"Clock sync failed: {e}")
-                import traceback
-                traceback.print_exc(file=sys.stderr)
+                # Not fatal: the connection itself is fine, so keep the warning short
+                logger.warning(f"Clock sync failed: {e!r}")
 
         return True
 
     except Exception as e:
-        logger.error(f"Failed to connect to {serial_port}: {e}")
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        logger.exception(f"Failed to connect to {serial_port}: {e}")
         return False
 
 
-def parse_args():
-    """Parse command-line arguments."""
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
     parser = argparse.ArgumentParser(
         description="MeshCore MCP Server - HTTP/Streamable transport"
     )
@@ -132,12 +157,44 @@ def parse_args():
         action="store_true",
         help="Automatically sync device clock to system time on startup (requires --serial-port)"
     )
+    parser.add_argument(
+        "--access-log",
+        action="store_true",
+        help="Enable uvicorn per-request access logging (disabled by default)"
+    )
+    parser.add_argument(
+        "--timeout-keep-alive",
+        type=int,
+        default=75,
+        help="Seconds to keep idle HTTP connections open between MCP requests (default: 75)"
+    )
+    parser.add_argument(
+        "--limit-concurrency",
+        type=int,
+        default=64,
+        help="Maximum concurrent HTTP connections before returning 503 (default: 64)"
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=128,
+        help="Maximum number of pending TCP connections (default: 128)"
+    )
     parser.add_argument(
         "--verbose", "-v",
         action="store_true",
         help="Enable verbose (DEBUG level) logging. Default is INFO level."
     )
-    return parser.parse_args()
+    return parser
+
+
+# Built once at import so forked workers and tools inspecting the CLI share it
+_PARSER = _build_parser()
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments (sys.argv[1:] when argv is None)."""
+    return _PARSER.parse_args(argv)
 
 
 def main():
@@ -152,25 +209,24 @@ def main():
         handlers=[logging.StreamHandler(sys.stderr)]
     )
 
-    logger.info(f"Starting MeshCore MCP Server on {args.host}:{args.port}")
-    logger.info(f"Server URL: http://{args.host}:{args.port}")
+    # Import meshcore library
+    try:
+        from meshcore import EventType
+    except ImportError:
+        print("Error: meshcore library not installed. Run: pip install meshcore", file=sys.stderr)
+        sys.exit(1)
+
+    # Import our modules
+    from .state import state
+    from .message_handlers import handle_contact_message, handle_channel_message, handle_advertisement, cleanup_message_subscriptions
+
+    logger.info(f"Starting MeshCore MCP Server on {args.host}:{args.port} (URL: http://{args.host}:{args.port})")
 
     # Get the Starlette app for streamable HTTP transport
-    app = mcp.streamable_http_app()
+    app = get_mcp().streamable_http_app()
 
     # Add middleware to handle trailing slash without redirecting
     # MCPO may append trailing slashes which causes 307 redirects by default
-    from starlette.middleware.base import BaseHTTPMiddleware
-    from starlette.requests import Request
-
-    class TrailingSlashMiddleware(BaseHTTPMiddleware):
-        """Normalize trailing slashes to avoid 307 redirects."""
-        async def dispatch(self, request: Request, call_next):
-            # If path ends with /, remove it before processing
-            if request.url.path.endswith("/") and request.url.path != "/":
-                request.scope["path"] = request.url.path.rstrip("/")
-            return await call_next(request)
-
     app.add_middleware(TrailingSlashMiddleware)
 
     # Add startup/shutdown handling via lifespan
@@ -180,6 +236,13 @@ def main():
         # Save the original lifespan
         original_lifespan = app.router.lifespan_context
 
+        # Handlers subscribed once the device is connected
+        startup_subs = (
+            (EventType.CONTACT_MSG_RECV, handle_contact_message),
+            (EventType.CHANNEL_MSG_RECV, handle_channel_message),
+            (EventType.ADVERTISEMENT, handle_advertisement),
+        )
+
         @asynccontextmanager
         async def combined_lifespan(app):
             """Combined lifespan that chains our startup with FastMCP's."""
@@ -190,51 +253,27 @@ def main():
                 connected = await startup_connect(args.serial_port, args.baud_rate, args.debug, args.sync_clock_on_startup)
 
                 if not connected:
-                    logger.error(f"FATAL: Failed to connect to {args.serial_port}")
-                    logger.error("Shutting down server...")
-                    # Force exit since we can't stop uvicorn gracefully from here
-                    import os
-                    os._exit(1)
+                    logger.error(f"FATAL: Failed to connect to {args.serial_port}. Shutting down server...")
+                    # Failing the lifespan startup makes uvicorn unwind FastMCP's
+                    # lifespan and exit with its startup-failure status
+                    raise RuntimeError(f"Failed to connect to {args.serial_port}")
 
                 logger.info("Device connected. Starting message listening...")
 
                 # Auto-start message listening
                 try:
-                    # Subscribe to contact messages
-                    contact_sub = state.meshcore.subscribe(
-                        EventType.CONTACT_MSG_RECV,
-                        handle_contact_message
-                    )
-                    state.message_subscriptions.append(contact_sub)
-                    logger.info("Subscribed to contact messages")
-
-                    # Subscribe to channel messages
-                    channel_sub = state.meshcore.subscribe(
-                        EventType.CHANNEL_MSG_RECV,
-                        handle_channel_message
-                    )
-                    state.message_subscriptions.append(channel_sub)
-                    logger.info("Subscribed to channel messages")
-
-                    # Subscribe to advertisements
-                    advert_sub = state.meshcore.subscribe(
-                        EventType.ADVERTISEMENT,
-                        handle_advertisement
-                    )
-                    state.message_subscriptions.append(advert_sub)
-                    logger.info("Subscribed to advertisements")
+                    for event_type, handler in startup_subs:
+                        state.message_subscriptions.append(state.meshcore.subscribe(event_type, handler))
+                    logger.info("Subscribed to contact messages, channel messages and advertisements")
 
                     # Start auto message fetching
                     await state.meshcore.start_auto_message_fetching()
-                    logger.info("Auto message fetching started")
 
                     state.is_listening = True
-                    logger.info(f"Message listening active with {len(state.message_subscriptions)} subscriptions")
+                    logger.info(f"Auto message fetching started. Message listening active with {len(state.message_subscriptions)} subscriptions")
 
                 except Exception as e:
-                    logger.warning(f"Failed to start message listening: {e}")
-                    import traceback
-                    traceback.print_exc(file=sys.stderr)
+                    logger.warning(f"Failed to start message listening: {e}", exc_info=True)
 
                 logger.info("Server ready.")
 
@@ -251,12 +290,25 @@ def main():
         # Replace with combined lifespan
         app.router.lifespan_context = combined_lifespan
     else:
-        logger.info("No auto-connect configured. Use --serial-port to enable.")
-        logger.info("Devices can be connected via meshcore_connect tool after server starts.")
+        logger.info("No auto-connect configured. Use --serial-port to enable, or connect devices via the meshcore_connect tool after the server starts.")
 
-    # Run with uvicorn to support custom host and port
+    # Run with uvicorn to support custom host and port. "auto" selects uvloop
+    # and httptools when the speedups extra is installed, and falls back to
+    # asyncio and h11 otherwise. The keep-alive default is well above
+    # uvicorn's 5s so an MCP client's connection survives the gaps between
+    # tool calls instead of being re-established for each one.
     import uvicorn
-    uvicorn.run(app, host=args.host, port=args.port)
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="auto",
+        http="auto",
+        access_log=args.access_log,
+        timeout_keep_alive=args.timeout_keep_alive,
+        limit_concurrency=args.limit_concurrency,
+        backlog=args.backlog,
+    )
 
 
 if __name__ == "__main__":
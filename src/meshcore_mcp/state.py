@@ -1,6 +1,9 @@
 """Server state management for MeshCore MCP Server."""
 
-from typing import Optional, List
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional, List, Union
 from collections import deque
 
 try:
@@ -8,19 +11,105 @@ try:
 except ImportError:
     MeshCore = None
 
+# Maximum number of received messages of each type kept in the ring buffers
+MESSAGE_BUFFER_SIZE = 1000
 
+
+@dataclass(slots=True, frozen=True)
+class SerialParams:
+    """Parameters for a serial connection."""
+
+    port: str
+    baud_rate: int = 115200
+
+
+@dataclass(slots=True, frozen=True)
+class BLEParams:
+    """Parameters for a BLE connection."""
+
+    address: str
+    pin: Optional[str] = None
+
+
+@dataclass(slots=True, frozen=True)
+class TCPParams:
+    """Parameters for a TCP connection."""
+
+    host: str
+    port: int
+    auto_reconnect: bool = False
+
+
+ConnectionParams = Union[SerialParams, BLEParams, TCPParams]
+
+
+@dataclass(slots=True)
+class Message:
+    """A received contact or channel message held in the message buffers."""
+
+    type: str
+    received_at: float  # Unix time, formatted only when the message is read
+    sender: str
+    sender_key: str
+    pubkey_prefix: str
+    text: str
+    raw_payload: dict
+    channel: Any = None  # Channel messages only
+
+    @property
+    def timestamp(self) -> str:
+        """Arrival time as a UTC ISO 8601 string with millisecond precision."""
+        return datetime.fromtimestamp(self.received_at, timezone.utc).isoformat(timespec="milliseconds")
+
+    def to_dict(self) -> dict:
+        """Return the message as a plain dict, e.g. for JSON output."""
+        data = {"type": self.type, "timestamp": self.timestamp}
+        if self.type == "channel":
+            data["channel"] = self.channel
+        data["sender"] = self.sender
+        data["sender_key"] = self.sender_key
+        data["pubkey_prefix"] = self.pubkey_prefix
+        data["text"] = self.text
+        data["raw_payload"] = self.raw_payload
+        return data
+
+
+@dataclass(slots=True)
 class ServerState:
     """Maintains global server state."""
+
     meshcore: Optional[MeshCore] = None
     connection_type: Optional[str] = None
-    connection_params: dict = {}
+    connection_params: Optional[ConnectionParams] = None
     debug: bool = False
 
+    # Monotonic time of the last successful is_connected check
+    last_live_ts: float = 0.0
+
+    # Auto-reconnect backoff: current delay and earliest next attempt (monotonic)
+    reconnect_backoff: float = 0.0
+    next_reconnect_ts: float = 0.0
+
+    # Serializes commands over the single serial/BLE/TCP link to the device
+    command_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
     # Message listening state
-    message_buffer: deque = deque(maxlen=1000)  # Store up to 1000 messages
-    message_subscriptions: List = []  # Active subscriptions
+    # One bounded ring buffer per message type, oldest dropped first, so
+    # type-filtered reads and clears never scan the other type. Entries are
+    # (arrival sequence number, message) so the two can be merged in order.
+    contact_buffer: deque = field(default_factory=lambda: deque(maxlen=MESSAGE_BUFFER_SIZE))
+    channel_buffer: deque = field(default_factory=lambda: deque(maxlen=MESSAGE_BUFFER_SIZE))
+    message_subscriptions: List = field(default_factory=list)  # Active subscriptions
     is_listening: bool = False
 
+    def message_buffer(self, message_type: str) -> deque:
+        """Return the buffer holding messages of the given type ('contact' or 'channel')."""
+        return self.contact_buffer if message_type == "contact" else self.channel_buffer
+
+    def buffered_message_count(self) -> int:
+        """Return the total number of buffered messages."""
+        return len(self.contact_buffer) + len(self.channel_buffer)
+
 
 # Global state instance
 state = ServerState()
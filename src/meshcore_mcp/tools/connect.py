@@ -1,14 +1,16 @@
 """Connection management tools."""
 
-from typing import Optional
+import logging
+import os
+from typing import Literal, Optional
 
-try:
-    from meshcore import MeshCore
-except ImportError:
-    MeshCore = None
-
-from ..state import state
+from ..state import state, SerialParams, BLEParams, TCPParams
+from ..connection import CONNECTORS, open_connection
 from ..message_handlers import cleanup_message_subscriptions
+from ..cache import clear_cache
+
+# Configure logger
+logger = logging.getLogger(__name__)
 
 
 def register_tools(mcp):
@@ -16,7 +18,7 @@ def register_tools(mcp):
 
     @mcp.tool()
     async def meshcore_connect(
-        type: str,
+        type: Literal["serial", "ble", "tcp"],
         port: Optional[str] = "/dev/ttyUSB0",
         baud_rate: int = 115200,
         address: Optional[str] = None,
@@ -41,7 +43,8 @@ def register_tools(mcp):
             host: TCP host/IP address (for tcp)
             pin: BLE pairing PIN (optional)
             auto_reconnect: Enable auto-reconnection (default: false)
-            debug: Enable debug logging (default: false)
+            debug: Enable debug logging (default: false). Only honoured when the server
+                   was started with MESHCORE_DEBUG=1, as it slows down the receive loop.
 
         Returns:
             Connection status message
@@ -50,57 +53,55 @@ def register_tools(mcp):
         if state.meshcore is not None and state.meshcore.is_connected:
             return f"Already connected via {state.connection_type}. Disconnect first."
 
-        try:
-            if type == "serial":
-                state.meshcore = await MeshCore.create_serial(port, baud_rate, debug=debug)
-                state.connection_type = "serial"
-                state.connection_params = {"port": port, "baud_rate": baud_rate}
-                state.debug = debug
-
-            elif type == "ble":
-                if not address:
-                    return "Error: 'address' required for BLE connection"
+        # Verbose meshcore logging formats every frame, so it is opt-in per server
+        debug_note = ""
+        if debug and os.environ.get("MESHCORE_DEBUG") != "1":
+            logger.warning("debug=True ignored: set MESHCORE_DEBUG=1 to enable MeshCore debug logging")
+            debug_note = "\nNote: debug=True was ignored; the server must be started with MESHCORE_DEBUG=1 to enable it."
+            debug = False
 
-                state.meshcore = await MeshCore.create_ble(address, pin=pin)
-                state.connection_type = "ble"
-                state.connection_params = {"address": address, "pin": pin}
-                state.debug = debug
+        # Cached query results belong to the previous device
+        clear_cache()
 
-            elif type == "tcp":
-                tcp_host = host or address
-                if not tcp_host or not port:
-                    return "Error: 'host' and 'port' required for TCP connection"
-
-                port_int = int(port) if isinstance(port, str) else port
-
-                if auto_reconnect:
-                    state.meshcore = await MeshCore.create_tcp(
-                        tcp_host, port_int,
-                        auto_reconnect=True,
-                        max_reconnect_attempts=5
-                    )
-                else:
-                    state.meshcore = await MeshCore.create_tcp(tcp_host, port_int)
-
-                state.connection_type = "tcp"
-                state.connection_params = {
-                    "host": tcp_host,
-                    "port": port_int,
-                    "auto_reconnect": auto_reconnect
-                }
-                state.debug = debug
+        if type not in CONNECTORS:
+            return f"Error: Invalid connection type '{type}'. Must be 'serial', 'ble', or 'tcp'."
 
+        try:
+            if type == "serial":
+                params = SerialParams(port=port, baud_rate=baud_rate)
+            elif type == "ble":
+                params = BLEParams(address=address, pin=pin)
             else:
-                return f"Error: Invalid connection type '{type}'. Must be 'serial', 'ble', or 'tcp'."
-
-            return f"Successfully connected to MeshCore device via {type}"
+                tcp_host = host or address
+                # Coerce once here; the stored params are reused as-is on reconnect
+                if isinstance(port, str):
+                    if not port.isdecimal():
+                        return f"Error: Invalid TCP port '{port}'"
+                    port = int(port)
+                if port is not None and not 0 < port < 65536:
+                    return f"Error: TCP port {port} out of range (1-65535)"
+                params = TCPParams(host=tcp_host, port=port, auto_reconnect=auto_reconnect)
+
+            error = await open_connection(type, params, debug)
+            if error:
+                return error
+
+            state.connection_type = type
+            state.connection_params = params
+            state.debug = debug
+            state.reconnect_backoff = 0.0
+            state.next_reconnect_ts = 0.0
+
+            return f"Successfully connected to MeshCore device via {type}{debug_note}"
 
         except Exception as e:
+            logger.exception("Connection via %s failed", type)
             state.meshcore = None
             state.connection_type = None
-            state.connection_params = {}
+            state.connection_params = None
             state.debug = False
-            return f"Connection failed: {str(e)}"
+            state.last_live_ts = 0.0
+            return f"Connection failed: {e}"
 
     @mcp.tool()
     async def meshcore_disconnect() -> str:
@@ -116,17 +117,23 @@ def register_tools(mcp):
         try:
             # Clean up message subscriptions first
             cleanup_message_subscriptions()
-            state.message_buffer.clear()
+            state.contact_buffer.clear()
+            state.channel_buffer.clear()
+            clear_cache()
 
             await state.meshcore.disconnect()
             conn_type = state.connection_type
 
             state.meshcore = None
             state.connection_type = None
-            state.connection_params = {}
+            state.connection_params = None
             state.debug = False
+            state.last_live_ts = 0.0
+            state.reconnect_backoff = 0.0
+            state.next_reconnect_ts = 0.0
 
             return f"Disconnected from {conn_type} device"
 
         except Exception as e:
-            return f"Disconnect failed: {str(e)}"
+            logger.exception("Disconnect failed")
+            return f"Disconnect failed: {e}"
@@ -1,128 +1,148 @@
 """Device information and management tools."""
 
+from functools import partial
+from typing import Any, Callable
+
 try:
     from meshcore import EventType
+    _EVT_ERROR = EventType.ERROR
 except ImportError:
-    EventType = None
+    _EVT_ERROR = None
 
 from ..state import state
-from ..connection import ensure_connected
+from ..connection import requires_connection, run_command
+from ..cache import cached, CONTACTS_TTL, DEVICE_INFO_TTL, BATTERY_TTL
+from ..formatting import to_json
+
+# Last formatted output per query: (result event it was built from, text)
+_rendered: dict[str, tuple[Any, str]] = {}
+
+
+def _render(key: str, result: Any, render: Callable[[Any], str]) -> str:
+    """
+    Format a query result, reusing the text if it is the same result object.
+
+    cached() hands back the same event while its entry is fresh, so repeated
+    polls within the TTL skip the formatting entirely.
+
+    Args:
+        key: Query name the output belongs to
+        result: Result event returned by the query
+        render: Function formatting the event's payload
+
+    Returns:
+        Formatted output
+    """
+    entry = _rendered.get(key)
+    if entry is not None and entry[0] is result:
+        return entry[1]
+    text = render(result.payload)
+    _rendered[key] = (result, text)
+    return text
+
+
+def _format_contacts(contacts) -> str:
+    """Format a contacts payload as a numbered list."""
+    # Check if payload is a string (error/status message from device)
+    if isinstance(contacts, str):
+        return contacts
+
+    if not contacts:
+        return "No contacts found"
+
+    # meshcore returns a dict keyed by public key
+    if isinstance(contacts, dict):
+        contacts = contacts.values()
+
+    # Format contacts nicely
+    lines = ["Contacts:"]
+    for i, contact in enumerate(contacts, 1):
+        # Ensure contact is a dict before accessing attributes
+        if isinstance(contact, dict):
+            name = contact.get("adv_name") or "Unknown"
+            key = contact.get("public_key") or "N/A"
+            lines.append(f"{i}. {name} (key: {key})")
+        else:
+            # Handle non-dict contact entries gracefully
+            lines.append(f"{i}. {contact}")
+    lines.append("")
+
+    return "\n".join(lines)
+
+
+def _format_device_info(info) -> str:
+    """Format a device query payload as JSON."""
+    # Bare JSON so clients can parse the result directly
+    return to_json(info)
 
 
 def register_tools(mcp):
     """Register device tools with the MCP server."""
 
     @mcp.tool()
+    @requires_connection("Get contacts")
     async def meshcore_get_contacts() -> str:
         """
         Retrieve the list of all contacts from the MeshCore device.
 
+        Results are cached for a few seconds, so repeated calls do not query the radio each time.
+
         Returns:
             Formatted list of contacts with names and keys
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
+        result = await cached("contacts", CONTACTS_TTL, partial(run_command, state.meshcore.commands.get_contacts))
 
-        try:
-            result = await state.meshcore.commands.get_contacts()
+        if result.type is _EVT_ERROR:
+            return f"Get contacts failed: {result.payload}"
 
-            if result.type == EventType.ERROR:
-                return f"Get contacts failed: {result.payload}"
-
-            contacts = result.payload
-
-            # Check if payload is a string (error/status message from device)
-            if isinstance(contacts, str):
-                return contacts
-
-            if not contacts:
-                return "No contacts found"
-
-            # Format contacts nicely
-            output = "Contacts:\n"
-            for i, contact in enumerate(contacts, 1):
-                # Ensure contact is a dict before accessing attributes
-                if isinstance(contact, dict):
-                    name = contact.get("name", "Unknown")
-                    key = contact.get("pubkey_prefix", "N/A")
-                    output += f"{i}. {name} (key: {key})\n"
-                else:
-                    # Handle non-dict contact entries gracefully
-                    output += f"{i}. {contact}\n"
-
-            return output
-
-        except Exception as e:
-            return f"Get contacts failed: {str(e)}"
+        return _render("contacts", result, _format_contacts)
 
     @mcp.tool()
+    @requires_connection("Get device info")
     async def meshcore_get_device_info() -> str:
         """
         Query device information including name, version, and configuration.
 
+        Results are cached for a few seconds, so repeated calls do not query the radio each time.
+
         Returns:
-            Formatted device information
+            Device information as a JSON object
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
-
-        try:
-            result = await state.meshcore.commands.send_device_query()
+        result = await cached("device_info", DEVICE_INFO_TTL, partial(run_command, state.meshcore.commands.send_device_query))
 
-            if result.type == EventType.ERROR:
-                return f"Device query failed: {result.payload}"
+        if result.type is _EVT_ERROR:
+            return f"Device query failed: {result.payload}"
 
-            info = result.payload
-
-            # Format device info
-            output = "Device Information:\n"
-            for key, value in info.items():
-                output += f"  {key}: {value}\n"
-
-            return output
-
-        except Exception as e:
-            return f"Get device info failed: {str(e)}"
+        return _render("device_info", result, _format_device_info)
 
     @mcp.tool()
+    @requires_connection("Get battery")
     async def meshcore_get_battery() -> str:
         """
         Get the current battery level of the MeshCore device.
 
+        Results are cached for a few seconds, so repeated calls do not query the radio each time.
+
         Returns:
-            Battery status information
+            Battery status as a JSON object, or the battery level if the device reports a bare value
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
+        result = await cached("battery", BATTERY_TTL, partial(run_command, state.meshcore.commands.get_bat))
 
-        try:
-            result = await state.meshcore.commands.get_bat()
+        if result.type is _EVT_ERROR:
+            return f"Get battery failed: {result.payload}"
 
-            if result.type == EventType.ERROR:
-                return f"Get battery failed: {result.payload}"
+        battery_data = result.payload
 
-            battery_data = result.payload
+        # Format battery info; dicts as bare JSON so clients can parse them directly
+        if isinstance(battery_data, dict):
+            output = to_json(battery_data)
+        else:
+            output = f"Battery Level: {battery_data}"
 
-            # Format battery info
-            if isinstance(battery_data, dict):
-                output = "Battery Status:\n"
-                for key, value in battery_data.items():
-                    output += f"  {key}: {value}\n"
-            else:
-                output = f"Battery Level: {battery_data}"
-
-            return output
-
-        except Exception as e:
-            return f"Get battery failed: {str(e)}"
+        return output
 
     @mcp.tool()
+    @requires_connection("Send advert")
     async def meshcore_send_advert(flood: bool = False) -> str:
         """
         Send an advertisement to the mesh network.
@@ -140,19 +160,10 @@ def register_tools(mcp):
             - Zero-hop advert (immediate neighbors only): flood=False
             - Flooded advert (entire network via repeaters): flood=True
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
-
-        try:
-            result = await state.meshcore.commands.send_advert(flood=flood)
-
-            if result.type == EventType.ERROR:
-                return f"Send advert failed: {result.payload}"
+        result = await run_command(state.meshcore.commands.send_advert, flood=flood)
 
-            advert_type = "flooded (multi-hop)" if flood else "zero-hop"
-            return f"Advertisement sent successfully ({advert_type})\nResult: {result.type.name}"
+        if result.type is _EVT_ERROR:
+            return f"Send advert failed: {result.payload}"
 
-        except Exception as e:
-            return f"Send advert failed: {str(e)}"
+        advert_type = "flooded (multi-hop)" if flood else "zero-hop"
+        return f"Advertisement sent successfully ({advert_type})\nResult: {result.type.name}"
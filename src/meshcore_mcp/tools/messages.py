@@ -1,28 +1,121 @@
 """Message sending and listening tools."""
 
+import heapq
 import logging
-import sys
-from typing import Optional
-from collections import deque
+from functools import partial
+from itertools import islice
+from typing import Literal, Optional
 
 try:
     from meshcore import EventType
+    _EVT_ERROR = EventType.ERROR
+    _EVT_CONTACT_MSG_RECV = EventType.CONTACT_MSG_RECV
+    _EVT_CHANNEL_MSG_RECV = EventType.CHANNEL_MSG_RECV
 except ImportError:
-    EventType = None
+    _EVT_ERROR = _EVT_CONTACT_MSG_RECV = _EVT_CHANNEL_MSG_RECV = None
 
-from ..state import state
-from ..connection import ensure_connected
+from ..state import state, Message
+from ..connection import ensure_connected, requires_connection, run_command
 from ..channels import parse_channel_input, get_channel_display_name
 from ..message_handlers import handle_contact_message, handle_channel_message, cleanup_message_subscriptions
+from ..cache import cached, peek, CONTACTS_TTL
+from ..formatting import to_json
 
 # Configure logger
 logger = logging.getLogger(__name__)
 
+# Shortest public key prefix (hex characters) matched against contacts
+MIN_KEY_PREFIX_LEN = 12
+
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+# Rules framing the meshcore_get_messages listing
+_HDR_LINE = "=" * 60 + "\n"
+_SEP_LINE = "-" * 60 + "\n"
+
+
+def _is_key_prefix(destination: str) -> bool:
+    """Return True if destination is a hex public key prefix meshcore can send to as is."""
+    return len(destination) >= MIN_KEY_PREFIX_LEN and all(c in _HEX_DIGITS for c in destination.lower())
+
+
+def _find_contact(contacts, destination: str) -> tuple[Optional[dict], Optional[str]]:
+    """
+    Find a contact by name, falling back to a public key prefix match.
+
+    A prefix is only tried when it is hex and at least MIN_KEY_PREFIX_LEN
+    characters (the 6-byte prefix meshcore requires), so a short name that
+    happens to look like hex cannot silently pick some other contact.
+
+    Args:
+        contacts: Contacts payload from get_contacts (dict keyed by public key, or a list)
+        destination: Contact name or public key prefix
+
+    Returns:
+        Tuple of (contact dict or None, error message or None). Both are None
+        when nothing matches, in which case the destination is used as given.
+    """
+    if isinstance(contacts, dict):
+        contacts = contacts.values()
+    elif not isinstance(contacts, list):
+        return None, None
+
+    wanted = destination.strip().lower()
+    if not wanted:
+        return None, None
+
+    matches = [
+        contact for contact in contacts
+        if isinstance(contact, dict) and contact.get("adv_name", "").lower() == wanted
+    ]
+    if not matches and _is_key_prefix(wanted):
+        matches = [
+            contact for contact in contacts
+            if isinstance(contact, dict) and contact.get("public_key", "").lower().startswith(wanted)
+        ]
+
+    if len(matches) > 1:
+        names = ", ".join(contact.get("adv_name") or contact.get("public_key", "?")[:12] for contact in matches)
+        return None, f"Error: '{destination}' matches several contacts ({names}). Use a longer public key prefix."
+    return (matches[0] if matches else None), None
+
+
+def _format_messages(messages: list[Message]) -> list[str]:
+    """Render buffered messages as the human-readable listing, one string per piece."""
+    parts = [f"Messages ({len(messages)} total):\n", _HDR_LINE]
+
+    for i, msg in enumerate(messages, 1):
+        msg_type = msg.type.upper()
+        timestamp = msg.timestamp
+        sender = msg.sender
+        pubkey_prefix = msg.pubkey_prefix
+        text = msg.text
+
+        parts.append(f"\n[{i}] {msg_type} MESSAGE\n  Time: {timestamp}\n  From: {sender}\n")
+
+        # Show public key as a separate field for clarity
+        if pubkey_prefix != "N/A":
+            parts.append(f"  Public Key: {pubkey_prefix}\n")
+
+        if msg.type == "channel":
+            channel_num = msg.channel
+            if isinstance(channel_num, int):
+                channel_display = get_channel_display_name(channel_num)
+            else:
+                channel_display = str(channel_num)
+            parts.append(f"  Channel: {channel_display}\n")
+
+        parts.append(f"  Message: {text}\n")
+        parts.append(_SEP_LINE)
+
+    return parts
+
 
 def register_tools(mcp):
     """Register message tools with the MCP server."""
 
     @mcp.tool()
+    @requires_connection("Send message")
     async def meshcore_send_message(
         text: str,
         destination: Optional[str] = None,
@@ -36,7 +129,8 @@ def register_tools(mcp):
 
         Args:
             text: Message text to send
-            destination: Contact name or public key prefix (for individual messages)
+            destination: Contact name or public key prefix of at least 12 hex characters
+                         (for individual messages)
             channel: Channel number (0-7) or channel name (for channel/broadcast messages).
                      Common channels:
                      - 0 or "general" or "public": Main public channel (most common default)
@@ -55,11 +149,6 @@ def register_tools(mcp):
             - Send to general channel: destination=None, channel=0 or channel="general"
             - Send to channel 5: destination=None, channel=5
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
-
         # Validate parameters
         if destination and channel is not None:
             return "Error: Specify either 'destination' or 'channel', not both"
@@ -67,75 +156,96 @@ def register_tools(mcp):
         if not destination and channel is None:
             return "Error: Must specify either 'destination' or 'channel'"
 
-        try:
-            if channel is not None:
-                # Parse channel input (handles both numbers and names)
-                channel_num, parse_error = parse_channel_input(channel)
-                if parse_error:
-                    return parse_error
-
-                # Send to channel using dedicated channel message method
-                result = await state.meshcore.commands.send_chan_msg(channel_num, text)
-                channel_display = get_channel_display_name(channel_num)
-                msg_type = f"channel {channel_display}"
+        if channel is not None:
+            # Parse channel input (handles both numbers and names)
+            channel_num, parse_error = parse_channel_input(channel)
+            if parse_error:
+                return parse_error
+
+            # Send to channel using dedicated channel message method
+            result = await run_command(state.meshcore.commands.send_chan_msg, channel_num, text)
+            channel_display = get_channel_display_name(channel_num)
+            msg_type = f"channel {channel_display}"
+        else:
+            # Resolve the destination against the cached contact list so
+            # names work and repeat sends skip a contacts round-trip
+            contact = None
+            if _is_key_prefix(destination.strip()):
+                # send_msg takes a hex key directly, so only use the contact
+                # list if it is already cached rather than waiting on a fetch
+                contacts = peek("contacts", CONTACTS_TTL)
+            else:
+                try:
+                    contacts = await cached(
+                        "contacts", CONTACTS_TTL,
+                        partial(run_command, state.meshcore.commands.get_contacts)
+                    )
+                except Exception:
+                    # Fall back to sending to the destination as given
+                    logger.warning("Contact lookup failed, sending to '%s' as given", destination, exc_info=True)
+                    contacts = None
+            if contacts is not None and contacts.type is not _EVT_ERROR:
+                contact, lookup_error = _find_contact(contacts.payload, destination)
+                if lookup_error:
+                    return lookup_error
+
+            # Send to individual contact
+            result = await run_command(state.meshcore.commands.send_msg, contact or destination, text)
+            if contact is not None:
+                msg_type = f"contact {contact.get('adv_name') or destination}"
             else:
-                # Send to individual contact
-                result = await state.meshcore.commands.send_msg(destination, text)
                 msg_type = f"contact {destination}"
 
-            if result.type == EventType.ERROR:
-                return f"Send failed: {result.payload}"
+        if result.type is _EVT_ERROR:
+            return f"Send failed: {result.payload}"
 
-            return f"Message sent to {msg_type}: \"{text}\"\nResult: {result.type.name}"
-
-        except Exception as e:
-            return f"Send message failed: {str(e)}"
+        return f"Message sent to {msg_type}: \"{text}\"\nResult: {result.type.name}"
 
     @mcp.tool()
     async def meshcore_start_message_listening() -> str:
         """
         Start listening for incoming messages from contacts and channels.
 
-        Messages will be stored in a buffer (up to 1000 messages) and can be retrieved
+        Messages will be stored in a buffer (up to 1000 messages of each type) and can be retrieved
         using meshcore_get_messages.
 
         Returns:
             Status message indicating if listening started successfully
         """
         logger.debug("meshcore_start_message_listening called")
-        logger.debug(f"Current listening state: {state.is_listening}")
-        logger.debug(f"Current buffer size: {len(state.message_buffer)}")
+        logger.debug("Current listening state: %s", state.is_listening)
+        logger.debug("Current buffer size: %d", state.buffered_message_count())
 
         # Ensure connected (auto-reconnect if needed)
         error = await ensure_connected()
         if error:
-            logger.debug(f"Connection check failed: {error}")
+            logger.debug("Connection check failed: %s", error)
             return error
 
-        logger.debug(f"Connection verified. Connected: {state.meshcore.is_connected if state.meshcore else False}")
+        logger.debug("Connection verified. Connected: %s", state.meshcore is not None and state.meshcore.is_connected)
 
         if state.is_listening:
-            logger.debug(f"Already listening with {len(state.message_subscriptions)} active subscriptions")
+            logger.debug("Already listening with %d active subscriptions", len(state.message_subscriptions))
             return "Already listening for messages"
 
         try:
             logger.debug("Subscribing to CONTACT_MSG_RECV events")
             # Subscribe to contact messages
             contact_sub = state.meshcore.subscribe(
-                EventType.CONTACT_MSG_RECV,
+                _EVT_CONTACT_MSG_RECV,
                 handle_contact_message
             )
             state.message_subscriptions.append(contact_sub)
-            logger.debug(f"Contact message subscription created: {contact_sub}")
+            logger.debug("Contact message subscription created: %s", contact_sub)
 
             logger.debug("Subscribing to CHANNEL_MSG_RECV events")
             # Subscribe to channel messages
             channel_sub = state.meshcore.subscribe(
-                EventType.CHANNEL_MSG_RECV,
+                _EVT_CHANNEL_MSG_RECV,
                 handle_channel_message
             )
             state.message_subscriptions.append(channel_sub)
-            logger.debug(f"Channel message subscription created: {channel_sub}")
+            logger.debug("Channel message subscription created: %s", channel_sub)
 
             # Start auto message fetching
             logger.debug("Starting auto message fetching")
@@ -143,14 +253,12 @@ def register_tools(mcp):
             logger.debug("Auto message fetching started")
 
             state.is_listening = True
-            logger.debug(f"Message listening started successfully. Active subscriptions: {len(state.message_subscriptions)}")
+            logger.debug("Message listening started successfully. Active subscriptions: %d", len(state.message_subscriptions))
 
             return "Started listening for messages. Messages will be buffered and can be retrieved with meshcore_get_messages."
 
         except Exception as e:
-            logger.error(f"Failed to start message listening: {e}")
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception("Failed to start message listening")
             cleanup_message_subscriptions()
             return f"Failed to start message listening: {str(e)}"
 
@@ -166,8 +274,8 @@ def register_tools(mcp):
             Status message
         """
         logger.debug("meshcore_stop_message_listening called")
-        logger.debug(f"Current listening state: {state.is_listening}")
-        logger.debug(f"Active subscriptions: {len(state.message_subscriptions)}")
+        logger.debug("Current listening state: %s", state.is_listening)
+        logger.debug("Active subscriptions: %d", len(state.message_subscriptions))
 
         if not state.is_listening:
             logger.debug("Not currently listening, nothing to stop")
@@ -183,20 +291,19 @@ def register_tools(mcp):
             # Clean up subscriptions
             cleanup_message_subscriptions()
 
-            logger.debug(f"Message listening stopped. Buffer size: {len(state.message_buffer)}")
+            logger.debug("Message listening stopped. Buffer size: %d", state.buffered_message_count())
             return "Stopped listening for messages. Message buffer retained."
 
         except Exception as e:
-            logger.error(f"Error stopping message listening: {e}")
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception("Error stopping message listening")
             return f"Error stopping message listening: {str(e)}"
 
     @mcp.tool()
     async def meshcore_get_messages(
         limit: Optional[int] = None,
         clear_after_read: bool = False,
-        message_type: Optional[str] = None
+        message_type: Optional[str] = None,
+        format: Literal["text", "json"] = "text"
     ) -> str:
         """
         Retrieve messages from the message buffer.
@@ -205,107 +312,83 @@ def register_tools(mcp):
             limit: Maximum number of messages to return (most recent first). If None, returns all.
             clear_after_read: If True, clears the returned messages from the buffer
             message_type: Filter by message type ('contact' or 'channel'). If None, returns all.
+            format: 'text' for a readable listing (default) or 'json' for a JSON array of
+                    message objects, which is faster to produce for large buffers.
 
         Returns:
             Formatted list of messages
         """
         logger.debug("meshcore_get_messages called")
-        logger.debug(f"Buffer size: {len(state.message_buffer)}")
-        logger.debug(f"Parameters - limit: {limit}, clear_after_read: {clear_after_read}, message_type: {message_type}")
-        logger.debug(f"Is listening: {state.is_listening}")
+        logger.debug("Buffer size: %d", state.buffered_message_count())
+        logger.debug("Parameters - limit: %s, clear_after_read: %s, message_type: %s", limit, clear_after_read, message_type)
+        logger.debug("Is listening: %s", state.is_listening)
 
-        if not state.message_buffer:
+        if not state.contact_buffer and not state.channel_buffer:
             logger.debug("No messages in buffer")
             return "No messages in buffer"
 
         try:
-            # Convert deque to list for easier manipulation
-            messages = list(state.message_buffer)
-            logger.debug(f"Retrieved {len(messages)} messages from buffer")
-
-            # Filter by message type if specified
+            # Filter by message type if specified; each type has its own buffer.
+            # Buffers are walked newest first, so no copy or reverse is needed.
             if message_type:
                 if message_type not in ["contact", "channel"]:
-                    logger.debug(f"Invalid message_type: {message_type}")
+                    logger.debug("Invalid message_type: %s", message_type)
                     return "Error: message_type must be 'contact' or 'channel'"
-                messages = [msg for msg in messages if msg.get("type") == message_type]
-                logger.debug(f"Filtered to {len(messages)} {message_type} messages")
-
-            # Reverse to show most recent first
-            messages.reverse()
+                entries = reversed(state.message_buffer(message_type))
+            else:
+                # Interleave both buffers by arrival order, most recent first
+                entries = heapq.merge(reversed(state.contact_buffer), reversed(state.channel_buffer), reverse=True)
 
-            # Apply limit if specified
+            # Apply limit if specified, stopping once enough messages are read
             if limit and limit > 0:
-                messages = messages[:limit]
-                logger.debug(f"Limited to {len(messages)} messages")
+                entries = islice(entries, limit)
+
+            messages = [msg for _, msg in entries]
+            logger.debug("Retrieved %d %smessages from buffer", len(messages), message_type + " " if message_type else "")
 
             if not messages:
                 logger.debug("No messages found after filtering")
                 return f"No {message_type + ' ' if message_type else ''}messages found"
 
             # Format output
-            output = f"Messages ({len(messages)} total):\n"
-            output += "=" * 60 + "\n"
-
-            for i, msg in enumerate(messages, 1):
-                msg_type = msg.get("type", "unknown").upper()
-                timestamp = msg.get("timestamp", "Unknown")
-                sender = msg.get("sender", "Unknown")
-                pubkey_prefix = msg.get("pubkey_prefix", "N/A")
-                text = msg.get("text", "")
-
-                output += f"\n[{i}] {msg_type} MESSAGE\n"
-                output += f"  Time: {timestamp}\n"
-                output += f"  From: {sender}\n"
-
-                # Show public key as a separate field for clarity
-                if pubkey_prefix != "N/A":
-                    output += f"  Public Key: {pubkey_prefix}\n"
-
-                if msg.get("type") == "channel":
-                    channel_num = msg.get('channel', 'Unknown')
-                    if isinstance(channel_num, int):
-                        channel_display = get_channel_display_name(channel_num)
-                    else:
-                        channel_display = str(channel_num)
-                    output += f"  Channel: {channel_display}\n"
-
-                output += f"  Message: {text}\n"
-                output += "-" * 60 + "\n"
+            if format == "json":
+                parts = [to_json([msg.to_dict() for msg in messages])]
+            else:
+                parts = _format_messages(messages)
 
             # Clear buffer if requested
             if clear_after_read:
                 logger.debug("Clearing messages from buffer")
                 if message_type:
                     # Remove only the filtered messages
-                    before_count = len(state.message_buffer)
-                    state.message_buffer = deque(
-                        [msg for msg in state.message_buffer if msg.get("type") != message_type],
-                        maxlen=1000
-                    )
-                    logger.debug(f"Removed {before_count - len(state.message_buffer)} {message_type} messages")
+                    buffer = state.message_buffer(message_type)
+                    removed = len(buffer)
+                    buffer.clear()
+                    logger.debug("Removed %d %s messages", removed, message_type)
                 elif limit:
-                    # Remove the limited number of most recent messages
+                    # Remove the limited number of most recent messages. They
+                    # are newest first, so each is the last one left in its buffer.
                     removed = 0
-                    for _ in range(min(limit, len(messages))):
-                        if state.message_buffer:
-                            state.message_buffer.pop()
+                    for msg in messages[:max(limit, 0)]:
+                        buffer = state.message_buffer(msg.type)
+                        if buffer:
+                            buffer.pop()
                             removed += 1
-                    logger.debug(f"Removed {removed} most recent messages")
+                    logger.debug("Removed %d most recent messages", removed)
                 else:
                     # Clear all
-                    cleared = len(state.message_buffer)
-                    state.message_buffer.clear()
-                    logger.debug(f"Cleared all {cleared} messages")
-                output += "\n(Messages cleared from buffer)\n"
+                    cleared = state.buffered_message_count()
+                    state.contact_buffer.clear()
+                    state.channel_buffer.clear()
+                    logger.debug("Cleared all %d messages", cleared)
+                if format != "json":
+                    parts.append("\n(Messages cleared from buffer)\n")
 
-            logger.debug(f"Returning {len(messages)} formatted messages. Buffer size now: {len(state.message_buffer)}")
-            return output
+            logger.debug("Returning %d formatted messages. Buffer size now: %d", len(messages), state.buffered_message_count())
+            return "".join(parts)
 
         except Exception as e:
-            logger.error(f"Error retrieving messages: {e}")
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.exception("Error retrieving messages")
             return f"Error retrieving messages: {str(e)}"
 
     @mcp.tool()
@@ -317,8 +400,9 @@ def register_tools(mcp):
             Status message with number of messages cleared
         """
         logger.debug("meshcore_clear_messages called")
-        count = len(state.message_buffer)
-        logger.debug(f"Clearing {count} messages from buffer")
-        state.message_buffer.clear()
-        logger.debug(f"Buffer cleared. New size: {len(state.message_buffer)}")
+        count = state.buffered_message_count()
+        logger.debug("Clearing %d messages from buffer", count)
+        state.contact_buffer.clear()
+        state.channel_buffer.clear()
+        logger.debug("Buffer cleared. New size: %d", state.buffered_message_count())
         return f"Cleared {count} message(s) from buffer"
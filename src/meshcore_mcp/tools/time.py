@@ -1,20 +1,49 @@
 """Time synchronization tools."""
 
-from datetime import datetime
+import time
+from functools import lru_cache
+from typing import Optional
 
 try:
     from meshcore import EventType
+    _EVT_ERROR = EventType.ERROR
 except ImportError:
-    EventType = None
+    _EVT_ERROR = None
 
 from ..state import state
-from ..connection import ensure_connected
+from ..connection import requires_connection, run_command
+
+# How recent (seconds) a known device time must be for sync_clock to trust it
+DEVICE_TIME_TTL = 0.5
+
+# Largest device/system clock difference (seconds) treated as in sync
+CLOCK_SYNC_TOLERANCE = 2
+
+# Last device time seen or set: (monotonic timestamp, Unix timestamp)
+_last_device_time: Optional[tuple[float, int]] = None
+
+
+@lru_cache(maxsize=512)
+def _format_ts(timestamp: int) -> tuple[str, str]:
+    """
+    Format a Unix timestamp in local time for display.
+
+    Args:
+        timestamp: Unix timestamp in seconds
+
+    Returns:
+        Tuple of ("YYYY-MM-DD HH:MM:SS", ISO 8601 string)
+    """
+    # localtime matches datetime.fromtimestamp without building a datetime
+    fields = time.localtime(timestamp)[:6]
+    return "%04d-%02d-%02d %02d:%02d:%02d" % fields, "%04d-%02d-%02dT%02d:%02d:%02d" % fields
 
 
 def register_tools(mcp):
     """Register time tools with the MCP server."""
 
     @mcp.tool()
+    @requires_connection("Get time")
     async def meshcore_get_time() -> str:
         """
         Get the current time from the MeshCore device.
@@ -22,37 +51,29 @@ def register_tools(mcp):
         Returns:
             Device time information including Unix timestamp and formatted datetime
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
+        result = await run_command(state.meshcore.commands.get_time)
 
-        try:
-            result = await state.meshcore.commands.get_time()
+        if result.type is _EVT_ERROR:
+            return f"Get time failed: {result.payload}"
 
-            if result.type == EventType.ERROR:
-                return f"Get time failed: {result.payload}"
+        # meshcore reports the device clock as {"time": <Unix timestamp>}
+        timestamp = result.payload
+        if isinstance(timestamp, dict):
+            timestamp = timestamp.get("time", timestamp)
 
-            # The payload should contain the Unix timestamp
-            timestamp = result.payload
+        # Format the response
+        if isinstance(timestamp, int):
+            global _last_device_time
+            _last_device_time = (time.monotonic(), timestamp)
 
-            # Format the response
-            if isinstance(timestamp, int):
-                # Convert Unix timestamp to human-readable format
-                dt = datetime.fromtimestamp(timestamp)
-                output = "Device Time:\n"
-                output += f"  Unix Timestamp: {timestamp}\n"
-                output += f"  Formatted: {dt.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                output += f"  ISO Format: {dt.isoformat()}\n"
-            else:
-                output = f"Device Time: {timestamp}"
+            # Convert Unix timestamp to human-readable format
+            formatted, iso = _format_ts(timestamp)
+            return f"Device Time:\n  Unix Timestamp: {timestamp}\n  Formatted: {formatted}\n  ISO Format: {iso}\n"
 
-            return output
-
-        except Exception as e:
-            return f"Get time failed: {str(e)}"
+        return f"Device Time: {timestamp}"
 
     @mcp.tool()
+    @requires_connection("Set time")
     async def meshcore_set_time(timestamp: int) -> str:
         """
         Set the device time to a specific Unix timestamp.
@@ -66,58 +87,60 @@ def register_tools(mcp):
         Example:
             - Set to specific time: timestamp=1732276800 (Nov 22, 2024 12:00:00 UTC)
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
-
-        try:
-            # Validate timestamp
-            if timestamp < 0:
-                return "Error: Timestamp must be a positive integer"
+        # Validate timestamp; the device stores it as an unsigned 32-bit value
+        if timestamp < 0:
+            return "Error: Timestamp must be a positive integer"
+        if timestamp > 0xFFFFFFFF:
+            return "Error: Timestamp must fit in 32 bits (at most 4294967295)"
 
-            # Convert timestamp to datetime for display
-            dt = datetime.fromtimestamp(timestamp)
+        result = await run_command(state.meshcore.commands.set_time, timestamp)
 
-            result = await state.meshcore.commands.set_time(timestamp)
+        if result.type is _EVT_ERROR:
+            return f"Set time failed: {result.payload}"
 
-            if result.type == EventType.ERROR:
-                return f"Set time failed: {result.payload}"
+        global _last_device_time
+        _last_device_time = (time.monotonic(), timestamp)
 
-            return f"Device time set successfully to:\n  Unix Timestamp: {timestamp}\n  Datetime: {dt.strftime('%Y-%m-%d %H:%M:%S')}\n  ISO Format: {dt.isoformat()}"
+        # Convert timestamp to datetime for display
+        formatted, iso = _format_ts(timestamp)
 
-        except Exception as e:
-            return f"Set time failed: {str(e)}"
+        return f"Device time set successfully to:\n  Unix Timestamp: {timestamp}\n  Datetime: {formatted}\n  ISO Format: {iso}"
 
     @mcp.tool()
+    @requires_connection("Clock sync")
     async def meshcore_sync_clock() -> str:
         """
         Synchronize the device clock to the current system time.
 
         This is a convenience function that gets the current system time and
-        sets the device clock to match it.
+        sets the device clock to match it. If the device time was read within
+        the last half second and is within 2 seconds of system time, the
+        device is left untouched.
 
         Returns:
             Status message with synchronization details
         """
-        # Ensure connected (auto-reconnect if needed)
-        error = await ensure_connected()
-        if error:
-            return error
-
-        try:
-            # Get current system time as Unix timestamp
-            import time
-            current_time = int(time.time())
-            dt = datetime.fromtimestamp(current_time)
-
-            # Set device time
-            result = await state.meshcore.commands.set_time(current_time)
-
-            if result.type == EventType.ERROR:
-                return f"Clock sync failed: {result.payload}"
-
-            return f"Device clock synchronized successfully!\n  System Time: {dt.strftime('%Y-%m-%d %H:%M:%S')}\n  Unix Timestamp: {current_time}\n  ISO Format: {dt.isoformat()}"
-
-        except Exception as e:
-            return f"Clock sync failed: {str(e)}"
+        # Get current system time as Unix timestamp
+        current_time = time.time_ns() // 1_000_000_000
+
+        # Skip the round-trip when the device clock was just seen to be in sync
+        global _last_device_time
+        known = _last_device_time
+        if (
+            known is not None
+            and time.monotonic() - known[0] < DEVICE_TIME_TTL
+            and abs(known[1] - current_time) <= CLOCK_SYNC_TOLERANCE
+        ):
+            formatted, iso = _format_ts(current_time)
+            return f"Device clock already in sync.\n  System Time: {formatted}\n  Unix Timestamp: {current_time}\n  ISO Format: {iso}"
+
+        # Set device time
+        result = await run_command(state.meshcore.commands.set_time, current_time)
+
+        if result.type is _EVT_ERROR:
+            return f"Clock sync failed: {result.payload}"
+
+        _last_device_time = (time.monotonic(), current_time)
+        formatted, iso = _format_ts(current_time)
+
+        return f"Device clock synchronized successfully!\n  System Time: {formatted}\n  Unix Timestamp: {current_time}\n  ISO Format: {iso}"